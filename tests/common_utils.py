@@ -3,9 +3,19 @@ import torchvision
 
 import inspect
 
+import tflite
+
 import models
 
 
+HAS_TF = False
+try:
+    import tensorflow as tf
+    HAS_TF = True
+except ImportError:
+    pass
+
+
 def collect_torchvision_models():
     torchvision_model_classes = []
     for key in torchvision.models.__dict__:
@@ -62,3 +72,38 @@ def prepare_inputs(model):
         t = torch.ones(shape)
         inputs.append(t)
     return inputs
+
+
+def get_tflite_out(model_path, inputs):
+    interpreter = tf.lite.Interpreter(model_path=model_path)
+    interpreter.allocate_tensors()
+
+    # Get input and output tensors.
+    input_details = interpreter.get_input_details()
+    output_details = interpreter.get_output_details()
+
+    for i in range(len(inputs)):
+        interpreter.set_tensor(input_details[i]['index'], inputs[i])
+
+    interpreter.invoke()
+
+    outputs = []
+    for i in range(len(output_details)):
+        output_data = interpreter.get_tensor(output_details[i]['index'])
+        outputs.append(output_data)
+
+    return outputs
+
+
+def get_tflite_ops(model_path):
+    op_names = {v: k for k, v in tflite.BuiltinOperator.__dict__.items() if not k.startswith('_')}
+
+    with open(model_path, 'rb') as f:
+        model = tflite.Model.GetRootAsModel(f.read(), 0)
+
+    subgraph = model.Subgraphs(0)
+    ops = []
+    for i in range(subgraph.OperatorsLength()):
+        op_code = model.OperatorCodes(subgraph.Operators(i).OpcodeIndex())
+        ops.append(op_names[op_code.BuiltinCode()])
+    return ops
@@ -0,0 +1,284 @@
+import unittest
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from tinynn.converter.operators import CommonGraph, ExtendedOperator, GraphOptimizer
+from tinynn.converter.operators import tflite as tfl
+from common_utils import HAS_TF, get_tflite_out
+
+
+def create_graph(inputs):
+    graph = CommonGraph()
+    for t in inputs:
+        graph.inputs.append(t.name)
+        graph.input_transpose.append(False)
+    graph.add_nodes(inputs, ExtendedOperator.INPUT_NODE)
+    return graph
+
+
+def add_outputs(graph, outputs):
+    names = [t.name for t in outputs]
+    graph.outputs.extend(names)
+    graph.add_outputs(names)
+
+
+def get_graph_ops(graph):
+    vertices = (graph.graph.vs[i] for i in graph.graph.topological_sorting())
+    return [v['node_type'] for v in vertices if v['node_type'] >= 0]
+
+
+def create_bn(inp, out_dtype, out_quantization, weight, bias, mean=None, var=None):
+    channels = len(weight)
+    if mean is None:
+        mean = np.zeros(channels, dtype='float32')
+    if var is None:
+        var = np.ones(channels, dtype='float32')
+
+    params = [tfl.Tensor(np.asarray(x, dtype='float32'), f'bn_{i}') for i, x in enumerate((weight, bias, mean, var))]
+    out = tfl.Tensor(np.zeros(inp.shape, dtype=out_dtype), 'bn_out', has_buffer=False, quantization=out_quantization)
+    return tfl.BatchNormOperator([inp] + params, [out], 1e-5)
+
+
+def create_conv(inp, weight, bias, name, padding=1, groups=1):
+    out_shape = F.conv2d(torch.zeros(inp.shape), torch.zeros(weight.shape), padding=padding, groups=groups).shape
+    out = tfl.Tensor(np.zeros(out_shape, dtype='float32'), name, has_buffer=False)
+    weight_tensor = tfl.Tensor(weight, f'{name}_weight')
+    bias_tensor = tfl.Tensor(bias, f'{name}_bias')
+    return tfl.GenericConvOperator([inp, weight_tensor, bias_tensor], [out], [1, 1], [padding, padding], [1, 1], [0, 0], groups)
+
+
+def create_deconv(inp, weight, bias, name, padding=1):
+    out_shape = F.conv_transpose2d(torch.zeros(inp.shape), torch.zeros(weight.shape), padding=padding).shape
+    out = tfl.Tensor(np.zeros(out_shape, dtype='float32'), name, has_buffer=False)
+    weight_tensor = tfl.Tensor(weight, f'{name}_weight')
+    bias_tensor = tfl.Tensor(bias, f'{name}_bias')
+    return tfl.GenericTransposeConvOperator([inp, weight_tensor, bias_tensor], [out], [1, 1], [padding, padding], [1, 1],
+                                            [0, 0], 1)
+
+
+def conv_ref(x, op):
+    weight, bias = op.inputs[1].tensor, op.inputs[2].tensor
+    return F.conv2d(torch.from_numpy(x), torch.from_numpy(weight), torch.from_numpy(bias),
+                    padding=op.padding[0], groups=op.groups).numpy()
+
+
+def deconv_ref(x, op):
+    weight, bias = op.inputs[1].tensor, op.inputs[2].tensor
+    return F.conv_transpose2d(torch.from_numpy(x), torch.from_numpy(weight), torch.from_numpy(bias),
+                              padding=op.padding[0]).numpy()
+
+
+class QuantizedBatchNormTest(unittest.TestCase):
+
+    def test_affine_ops(self):
+        inp = tfl.Tensor(np.zeros((1, 4, 8, 8), dtype='uint8'), 'x', has_buffer=False,
+                         quantization=tfl.QuantizationParameters(0.05, 128))
+        bn = create_bn(inp, 'uint8', tfl.QuantizationParameters(0.05, 128), [1.0] * 4, [0.1, 0.2, -0.1, 0.0])
+
+        ops = bn.quantized_affine_ops(np.ones(4, dtype='float32'), np.array([0.1, 0.2, -0.1, 0.0], dtype='float32'))
+
+        self.assertIsNotNone(ops)
+        conv_ops = [op for op in ops if op.op.code == ExtendedOperator.DEPTHWISE_CONV_2D]
+        self.assertEqual(len(conv_ops), 1)
+        self.assertEqual(conv_ops[0].inputs[1].dtype, np.uint8)
+        self.assertEqual(conv_ops[0].inputs[2].dtype, np.int32)
+
+    def test_affine_ops_int8_input(self):
+        inp = tfl.Tensor(np.zeros((1, 4, 8, 8), dtype='int8'), 'x', has_buffer=False,
+                         quantization=tfl.QuantizationParameters(0.05, 0))
+        bn = create_bn(inp, 'int8', tfl.QuantizationParameters(0.05, 0), [1.0] * 4, [0.0] * 4)
+
+        ops = bn.quantized_affine_ops(np.ones(4, dtype='float32'), np.zeros(4, dtype='float32'))
+
+        self.assertIsNone(ops)
+
+    def test_affine_ops_bias_out_of_range(self):
+        inp = tfl.Tensor(np.zeros((1, 4, 8, 8), dtype='uint8'), 'x', has_buffer=False,
+                         quantization=tfl.QuantizationParameters(0.05, 128))
+        bn = create_bn(inp, 'uint8', tfl.QuantizationParameters(0.05, 128), [1.0] * 4, [0.0] * 4)
+
+        # The bias scale is 0.05 * 1e-6 / 255, so the shift doesn't fit in int32
+        ops = bn.quantized_affine_ops(np.full(4, 1e-6, dtype='float32'), np.full(4, 1e3, dtype='float32'))
+
+        self.assertIsNone(ops)
+
+    def test_3d_fallback(self):
+        x = np.random.randint(0, 256, size=(1, 4, 16), dtype='uint8')
+        inp = tfl.Tensor(x, 'x', has_buffer=False, quantization=tfl.QuantizationParameters(0.05, 128))
+
+        weight = np.array([1.0, -0.5, 2.0, 0.75], dtype='float32')
+        bias = np.array([0.1, 0.2, -0.1, 0.0], dtype='float32')
+        out_quantization = tfl.QuantizationParameters(0.1, 128)
+
+        graph = create_graph([inp])
+        bn = create_bn(inp, 'uint8', out_quantization, weight, bias)
+        graph.add_operator(bn)
+        add_outputs(graph, bn.outputs)
+
+        GraphOptimizer(graph).transform_graph()
+
+        self.assertEqual(get_graph_ops(graph), [ExtendedOperator.DEQUANTIZE, ExtendedOperator.MUL,
+                                                ExtendedOperator.ADD, ExtendedOperator.QUANTIZE])
+
+        # Mul should take the dequantized input instead of the quantized one
+        mul = graph.graph.vs.find(node_type=ExtendedOperator.MUL)['op']
+        self.assertEqual(mul.inputs[0].dtype, np.float32)
+        self.assertIsNone(mul.inputs[0].quantization)
+
+        if HAS_TF:
+            out_path = 'out/quantized_bn_3d.tflite'
+            graph.convert(out_path)
+
+            y = get_tflite_out(out_path, [x])[0]
+
+            expected = ((x.astype('float32') - 128) * 0.05) * weight.reshape(1, -1, 1) / np.sqrt(1 + 1e-5) \
+                + bias.reshape(1, -1, 1)
+            expected = np.clip(np.round(expected / 0.1 + 128), 0, 255)
+            self.assertLessEqual(np.abs(y.astype('float32') - expected).max(), 1)
+
+
+class ConvLayoutTransposeSkipTest(unittest.TestCase):
+
+    def check_graph(self, graph, transpose_count):
+        nodes = graph.graph.vs.select(node_type=ExtendedOperator.TRANSPOSE)
+        self.assertEqual(len(nodes), transpose_count)
+        for node in nodes:
+            self.assertGreater(node.outdegree(), 0)
+
+        # No entries in the tensor maps should point at removed nodes
+        node_names = set(graph.graph.vs['name'])
+        for name in graph.tensor_node_map.values():
+            self.assertIn(name, node_names)
+
+    def check_outputs(self, graph, out_path, x, expected):
+        if not HAS_TF:
+            return
+
+        GraphOptimizer(graph).optimize()
+        graph.convert(out_path)
+
+        outputs = get_tflite_out(out_path, [x])
+        self.assertEqual(len(outputs), len(expected))
+        for y, ref in zip(outputs, expected):
+            self.assertTrue(np.allclose(y, ref, rtol=1e-3, atol=1e-4))
+
+    def test_conv_chain(self):
+        x = np.random.rand(1, 4, 8, 8).astype('float32')
+        inp = tfl.Tensor(x, 'x', has_buffer=False)
+        graph = create_graph([inp])
+
+        conv0 = create_conv(inp, np.random.rand(8, 4, 3, 3).astype('float32'), np.random.rand(8).astype('float32'), 'c0')
+        graph.add_operator(conv0)
+        conv1 = create_conv(conv0.outputs[0], np.random.rand(8, 8, 3, 3).astype('float32'),
+                            np.random.rand(8).astype('float32'), 'c1')
+        graph.add_operator(conv1)
+        add_outputs(graph, conv1.outputs)
+
+        y0 = conv_ref(x, conv0)
+        y1 = conv_ref(y0, conv1)
+
+        GraphOptimizer(graph).transform_graph()
+
+        # The NHWC->NCHW transpose after the first conv is skipped by the second one and then removed
+        self.check_graph(graph, 2)
+        self.assertNotIn('c0', graph.tensor_map)
+
+        self.check_outputs(graph, 'out/conv_chain.tflite', x, [y1])
+
+    def test_conv_deconv_chain(self):
+        x = np.random.rand(1, 4, 8, 8).astype('float32')
+        inp = tfl.Tensor(x, 'x', has_buffer=False)
+        graph = create_graph([inp])
+
+        conv0 = create_conv(inp, np.random.rand(8, 4, 3, 3).astype('float32'), np.random.rand(8).astype('float32'), 'c0')
+        graph.add_operator(conv0)
+        deconv = create_deconv(conv0.outputs[0], np.random.rand(8, 4, 3, 3).astype('float32'),
+                               np.random.rand(4).astype('float32'), 'd0')
+        graph.add_operator(deconv)
+        add_outputs(graph, deconv.outputs)
+
+        y0 = conv_ref(x, conv0)
+        y1 = deconv_ref(y0, deconv)
+
+        GraphOptimizer(graph).transform_graph()
+
+        # The deconv reads its input at index 1 of TransposeConv, and it skips the transpose all the same
+        self.check_graph(graph, 2)
+        self.assertNotIn('c0', graph.tensor_map)
+
+        self.check_outputs(graph, 'out/conv_deconv_chain.tflite', x, [y1])
+
+    def test_conv_branches(self):
+        x = np.random.rand(1, 4, 8, 8).astype('float32')
+        inp = tfl.Tensor(x, 'x', has_buffer=False)
+        graph = create_graph([inp])
+
+        conv0 = create_conv(inp, np.random.rand(8, 4, 3, 3).astype('float32'), np.random.rand(8).astype('float32'), 'c0')
+        graph.add_operator(conv0)
+        conv1 = create_conv(conv0.outputs[0], np.random.rand(8, 8, 3, 3).astype('float32'),
+                            np.random.rand(8).astype('float32'), 'c1')
+        graph.add_operator(conv1)
+        dw_conv = create_conv(conv0.outputs[0], np.random.rand(8, 1, 3, 3).astype('float32'),
+                              np.random.rand(8).astype('float32'), 'dw', groups=8)
+        graph.add_operator(dw_conv)
+        add_outputs(graph, conv0.outputs + conv1.outputs + dw_conv.outputs)
+
+        y0 = conv_ref(x, conv0)
+        y1 = conv_ref(y0, conv1)
+        y2 = conv_ref(y0, dw_conv)
+
+        GraphOptimizer(graph).transform_graph()
+
+        # Both of the convs skip the transpose after the first conv, but it is kept for the graph output
+        self.check_graph(graph, 4)
+        self.assertIn('c0', graph.tensor_map)
+        for op in (conv1, dw_conv):
+            self.assertNotEqual(op.inputs[0].name, 'c0')
+
+        self.check_outputs(graph, 'out/conv_branches.tflite', x, [y0, y1, y2])
+
+
+class ConvBiasTest(unittest.TestCase):
+
+    def transform_conv(self, inp, weight, bias):
+        graph = create_graph([inp])
+        out = tfl.Tensor(np.zeros((1, 8, 8, 8), dtype=inp.dtype), 'y', has_buffer=False, quantization=inp.quantization)
+        graph.add_operator(tfl.GenericConvOperator([inp, weight, bias], [out], [1, 1], [1, 1], [1, 1], [0, 0], 1))
+        add_outputs(graph, [out])
+
+        GraphOptimizer(graph).transform_graph()
+
+        conv_nodes = graph.graph.vs.select(node_type=ExtendedOperator.CONV_2D)
+        self.assertEqual(len(conv_nodes), 1)
+        return conv_nodes[0]['op'].inputs[2]
+
+    def test_scalar_bias(self):
+        inp = tfl.Tensor(np.zeros((1, 4, 8, 8), dtype='float32'), 'x', has_buffer=False)
+        weight = tfl.Tensor(np.random.rand(8, 4, 3, 3).astype('float32'), 'weight')
+        bias = tfl.Tensor(np.array([0.5], dtype='float32'), 'bias')
+
+        new_bias = self.transform_conv(inp, weight, bias)
+
+        self.assertEqual(new_bias.dtype, np.float32)
+        self.assertTrue(np.array_equal(new_bias.tensor, np.full((8, ), 0.5, dtype='float32')))
+
+    def test_quantized_scalar_bias(self):
+        inp = tfl.Tensor(np.zeros((1, 4, 8, 8), dtype='uint8'), 'x', has_buffer=False,
+                         quantization=tfl.QuantizationParameters(0.05, 128))
+        weight = tfl.Tensor(np.random.randint(0, 256, size=(8, 4, 3, 3), dtype='uint8'), 'weight',
+                            quantization=tfl.QuantizationParameters(0.01, 128))
+        bias_quantization = tfl.QuantizationParameters(0.0005, 0)
+        bias = tfl.Tensor(np.array([-7], dtype='int32'), 'bias', quantization=bias_quantization)
+
+        new_bias = self.transform_conv(inp, weight, bias)
+
+        self.assertEqual(new_bias.dtype, np.int32)
+        self.assertTrue(np.array_equal(new_bias.tensor, np.full((8, ), -7, dtype='int32')))
+        self.assertEqual(new_bias.quantization.scale, bias_quantization.scale)
+        self.assertEqual(new_bias.quantization.zero_point, bias_quantization.zero_point)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,15 +13,7 @@ import numpy as np
 from tinynn.converter import TFLiteConverter
 from tinynn.graph.tracer import model_tracer, trace
 from tinynn.graph.quantization.quantizer import QATQuantizer
-from common_utils import collect_custom_models, collect_torchvision_models, prepare_inputs
-
-
-HAS_TF = False
-try:
-    import tensorflow as tf
-    HAS_TF = True
-except ImportError:
-    pass
+from common_utils import HAS_TF, collect_custom_models, collect_torchvision_models, get_tflite_ops, get_tflite_out, prepare_inputs
 
 
 def data_to_tf(inputs, input_transpose):
@@ -32,27 +24,6 @@ def data_to_tf(inputs, input_transpose):
     return tf_inputs
 
 
-def get_tflite_out(model_path, inputs):
-    interpreter = tf.lite.Interpreter(model_path=model_path)
-    interpreter.allocate_tensors()
-
-    # Get input and output tensors.
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
-
-    for i in range(len(inputs)):
-        interpreter.set_tensor(input_details[i]['index'], inputs[i])
-
-    interpreter.invoke()
-
-    outputs = []
-    for i in range(len(output_details)):
-        output_data = interpreter.get_tensor(output_details[i]['index'])
-        outputs.append(output_data)
-
-    return outputs
-
-
 # Unsupported models
 # resnext: group convs
 # yolov4: 5-d slices
@@ -124,8 +95,77 @@ class TestModelMeta(type):
         return f
 
 
+class QuantizedBNModel(torch.nn.Module):
+    def __init__(self, weight):
+        super().__init__()
+        self.quant = torch.quantization.QuantStub()
+        self.bn = torch.nn.BatchNorm2d(len(weight))
+        self.dequant = torch.quantization.DeQuantStub()
+
+        self.bn.weight.data.copy_(torch.tensor(weight))
+        self.bn.bias.data.uniform_(-1, 1)
+        self.bn.running_mean.uniform_(-1, 1)
+        self.bn.running_var.fill_(1.0)
+
+    def forward(self, x):
+        return self.dequant(self.bn(self.quant(x)))
+
+
 class TestModel(unittest.TestCase, metaclass=TestModelMeta):
-    pass
+
+    def check_quantized_bn(self, weight, inputs, model_file):
+        torch.backends.quantized.engine = 'qnnpack'
+        torch.manual_seed(0)
+
+        m = QuantizedBNModel(weight)
+        m.eval()
+        m.qconfig = torch.quantization.get_default_qconfig('qnnpack')
+        torch.quantization.prepare(m, inplace=True)
+
+        with torch.no_grad():
+            m(*inputs)
+
+        torch.quantization.convert(m, inplace=True)
+
+        with torch.no_grad():
+            out_path = f'out/{model_file}.tflite'
+            converter = TFLiteConverter(m, inputs, out_path)
+            converter.convert()
+
+            if HAS_TF:
+                outputs = converter.get_outputs()
+                input_transpose = converter.input_transpose
+                input_tf = data_to_tf(inputs, input_transpose)
+                tf_outputs = get_tflite_out(out_path, input_tf)
+                self.assertTrue(len(outputs) == len(tf_outputs))
+                for pt, tt in zip(outputs, tf_outputs):
+                    # Allow for one quantization step of difference at most
+                    diff = (pt - torch.from_numpy(tt)).abs().max().item()
+                    self.assertLessEqual(diff, float(m.bn.scale) * 1.01)
+
+        return get_tflite_ops(out_path)
+
+    def test_quantized_bn(self):
+        # The per-channel scales are the same, so they are represented exactly with a per-tensor weight
+        torch.manual_seed(0)
+        inputs = [torch.randn(1, 4, 16, 16)]
+        ops = self.check_quantized_bn([1.0, 1.0, 1.0, 1.0], inputs, 'quantized_bn')
+        self.assertIn('DEPTHWISE_CONV_2D', ops)
+        self.assertNotIn('MUL', ops)
+
+    def test_quantized_bn_uneven_scales(self):
+        torch.manual_seed(0)
+        inputs = [torch.randn(1, 2, 16, 16)]
+        self.check_quantized_bn([10.0, 0.13], inputs, 'quantized_bn_uneven_scales')
+
+    def test_quantized_bn_fallback(self):
+        # The channel with the small scale has a wide range of input, so rounding its scale
+        # to the per-tensor weight would be far off. It should be kept as Mul and Add
+        torch.manual_seed(0)
+        inputs = [torch.cat([torch.randn(1, 1, 16, 16) * 10, torch.randn(1, 1, 16, 16) * 0.1], 1)]
+        ops = self.check_quantized_bn([0.01, 10.0], inputs, 'quantized_bn_fallback')
+        self.assertNotIn('DEPTHWISE_CONV_2D', ops)
+        self.assertIn('MUL', ops)
 
 
 if __name__ == '__main__':
@@ -11,15 +11,8 @@ import unittest
 import numpy as np
 
 from tinynn.converter import TFLiteConverter
-from common_utils import collect_custom_models, collect_torchvision_models, prepare_inputs
-
-
-HAS_TF = False
-try:
-    import tensorflow as tf
-    HAS_TF = True
-except ImportError:
-    pass
+from tinynn.converter.operators.optimize import fuse_bn_bias, fuse_bn_weight
+from common_utils import HAS_TF, collect_custom_models, collect_torchvision_models, get_tflite_ops, get_tflite_out, prepare_inputs
 
 
 def data_to_tf(inputs, input_transpose):
@@ -30,27 +23,6 @@ def data_to_tf(inputs, input_transpose):
     return tf_inputs
 
 
-def get_tflite_out(model_path, inputs):
-    interpreter = tf.lite.Interpreter(model_path=model_path)
-    interpreter.allocate_tensors()
-
-    # Get input and output tensors.
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
-
-    for i in range(len(inputs)):
-        interpreter.set_tensor(input_details[i]['index'], inputs[i])
-
-    interpreter.invoke()
-
-    outputs = []
-    for i in range(len(output_details)):
-        output_data = interpreter.get_tensor(output_details[i]['index'])
-        outputs.append(output_data)
-
-    return outputs
-
-
 # Unsupported models
 # resnext: group convs
 # yolov4: 5-d slices
@@ -92,32 +64,105 @@ class TestModelMeta(type):
 
             inputs = prepare_inputs(m)
 
-            with torch.no_grad():
-                out_path = f'out/{model_file}.tflite'
-                converter = TFLiteConverter(m, inputs, out_path)
-                converter.convert()
-
-                if HAS_TF:
-                    outputs = converter.get_outputs()
-                    input_transpose = converter.input_transpose
-                    input_tf = data_to_tf(inputs, input_transpose)
-                    tf_outputs = get_tflite_out(out_path, input_tf)
-                    output_tensors = list(map(torch.from_numpy, tf_outputs))
-                    for pt, tt in zip(outputs, output_tensors):
-                        result = torch.allclose(pt, tt, rtol=1e-2, atol=1e-5)
-                        if not result:
-                            print((pt - tt).abs().max(), (pt - tt).abs().min(), (pt - tt).abs().mean())
-
-                            print(pt[(pt - tt).abs() > 1e-4])
-                            print(tt[(pt - tt).abs() > 1e-4])
-                            os.remove(out_path)
-                        self.assertTrue(result)
+            convert_and_compare(self, m, inputs, f'out/{model_file}.tflite')
 
         return f
 
 
+def convert_and_compare(test, model, inputs, out_path):
+    with torch.no_grad():
+        converter = TFLiteConverter(model, inputs, out_path)
+        converter.convert()
+
+        if HAS_TF:
+            outputs = converter.get_outputs()
+            input_transpose = converter.input_transpose
+            input_tf = data_to_tf(inputs, input_transpose)
+            tf_outputs = get_tflite_out(out_path, input_tf)
+            output_tensors = list(map(torch.from_numpy, tf_outputs))
+            for pt, tt in zip(outputs, output_tensors):
+                result = torch.allclose(pt, tt, rtol=1e-2, atol=1e-5)
+                if not result:
+                    print((pt - tt).abs().max(), (pt - tt).abs().min(), (pt - tt).abs().mean())
+
+                    print(pt[(pt - tt).abs() > 1e-4])
+                    print(tt[(pt - tt).abs() > 1e-4])
+                    os.remove(out_path)
+                test.assertTrue(result)
+
+
+def randomize_bn(bn):
+    bn.weight.data.uniform_(-2, 2)
+    bn.bias.data.uniform_(-1, 1)
+    bn.running_mean.uniform_(-1, 1)
+    bn.running_var.uniform_(0.5, 2)
+
+
 class TestModel(unittest.TestCase, metaclass=TestModelMeta):
-    pass
+
+    def test_deconv_bn(self):
+        m = torch.nn.Sequential(torch.nn.ConvTranspose2d(8, 16, 3, stride=2, padding=1), torch.nn.BatchNorm2d(16))
+        randomize_bn(m[1])
+        m.eval()
+
+        inputs = [torch.rand(1, 8, 16, 16)]
+
+        convert_and_compare(self, m, inputs, 'out/deconv_bn.tflite')
+
+    def test_grouped_deconv_bn_fusion(self):
+        # The official tflite interpreter doesn't support grouped TRANSPOSE_CONV,
+        # so the folded weight is checked against PyTorch directly
+        deconv = torch.nn.ConvTranspose2d(8, 12, 3, groups=4)
+        bn = torch.nn.BatchNorm2d(12)
+        randomize_bn(bn)
+        bn.eval()
+
+        x = torch.rand(1, 8, 5, 5)
+
+        with torch.no_grad():
+            expected = bn(deconv(x))
+
+            weight = fuse_bn_weight(bn.eps, bn.weight.numpy(), bn.running_var.numpy(),
+                                    deconv.weight.numpy(), transpose=True, groups=deconv.groups)
+            bias = fuse_bn_bias(bn.eps, bn.weight.numpy(), bn.running_var.numpy(),
+                                bn.running_mean.numpy(), bn.bias.numpy(), deconv.bias.numpy())
+            actual = torch.nn.functional.conv_transpose2d(x, torch.from_numpy(weight),
+                                                          torch.from_numpy(bias), groups=deconv.groups)
+
+        self.assertTrue(torch.allclose(expected, actual, rtol=1e-4, atol=1e-5))
+
+    def check_conv_padding(self, input_size, kernel_size, stride, padding, dilation, expect_pad):
+        m = torch.nn.Conv2d(4, 8, kernel_size, stride=stride, padding=padding, dilation=dilation)
+        m.eval()
+
+        inputs = [torch.rand((1, 4) + input_size)]
+
+        out_path = 'out/conv_padding.tflite'
+        convert_and_compare(self, m, inputs, out_path)
+
+        self.assertEqual('PAD' in get_tflite_ops(out_path), expect_pad)
+
+    def test_conv_same_padding(self):
+        # (input_size, kernel_size, stride, padding, dilation)
+        cases = [((16, 16), 3, 1, 1, 1),
+                 ((15, 15), 3, 2, 1, 1),
+                 ((16, 16), 4, 2, 1, 1),
+                 ((16, 16), 5, 1, 2, 1),
+                 ((16, 16), 3, 1, 2, 2),
+                 ((16, 16), (3, 5), 1, (1, 2), 1)]
+
+        for case in cases:
+            with self.subTest(case=case):
+                self.check_conv_padding(*case, expect_pad=False)
+
+    def test_conv_explicit_padding(self):
+        # SAME padding would pad asymmetrically or produce a different output size for these
+        cases = [((16, 16), 3, 2, 1, 1),
+                 ((16, 16), 3, 1, 2, 1)]
+
+        for case in cases:
+            with self.subTest(case=case):
+                self.check_conv_padding(*case, expect_pad=True)
 
 
 if __name__ == '__main__':
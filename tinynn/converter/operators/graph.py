@@ -1,3 +1,4 @@
+import contextlib
 import os
 import typing
 import warnings
@@ -22,6 +23,8 @@ class CommonGraph(object):
     outputs: typing.List[str]
     input_transpose: typing.List[bool]
     node_op_counter: int
+    pending_restore_mapping: typing.Optional[typing.List[typing.Tuple[str, str]]]
+    bypassed_transposes: typing.Set[str]
 
     def __init__(self) -> None:
         self.graph = ig.Graph(directed=True)
@@ -32,6 +35,8 @@ class CommonGraph(object):
         self.outputs = []
         self.input_transpose = []
         self.node_op_counter = 0
+        self.pending_restore_mapping = None
+        self.bypassed_transposes = set()
 
     def add_iterable_pair(self, input_names: typing.List[str], output_names: typing.List[str], key: typing.Optional[str] = None):
         """ Adds the tensor mapping for a ListConstruct tensor
@@ -90,11 +95,20 @@ class CommonGraph(object):
         """
         node_name = self.tensor_node_map[name]
         node = self.graph.vs.find(name=node_name)
-        assert name in self.tensor_map, f"tensor {name} is in nodes map, but not in tensors map"
         # assert node["node_type"] == node_type, f"tensor {name} already exists, but with a different type"
-        assert id(self.tensor_map[name]) == id(tensor), f"tensor {name} already exists"
+        self.check_tensor_map(name, tensor)
         return node
 
+    def check_tensor_map(self, name: str, tensor: tfl.Tensor):
+        """ Checks whether the tensor in the nodes map is the same as the given one
+
+        Args:
+            name (str): The name of the tensor
+            tensor (tfl.Tensor): The tensor
+        """
+        assert name in self.tensor_map, f"tensor {name} is in nodes map, but not in tensors map"
+        assert id(self.tensor_map[name]) == id(tensor), f"tensor {name} already exists"
+
     def add_nodes(self, tensors: typing.List[tfl.Tensor], node_type=ExtendedOperator.CONSTANT_NODE) -> typing.List[ig.Vertex]:
         """ Add a list of nodes (usually special ones) with the tensors
 
@@ -132,46 +146,6 @@ class CommonGraph(object):
                 nodes.append(node)
         return nodes
 
-    def add_node(self, tensors: typing.List[tfl.Tensor], tfl_op: tfl.BaseOperator, output_exists: bool = False):
-        """ Add a node (usually a op node) with the output tensors
-
-        Args:
-            tensors (typing.List[tfl.Tensor]): The output tensors of the node
-            tfl_op (tfl.BaseOperator): The op to be added
-            output_exists (bool, optional): Whether the output may already exists. Defaults to False.
-
-        Returns:
-            [type]: [description]
-        """
-
-        output_names = [t.name for t in tfl_op.outputs]
-        node_unique_name = f'__tinynn_op_{self.node_op_counter}__'
-        self.node_op_counter += 1
-        if tfl_op.op.custom_code is not None:
-            node = self.graph.add_vertex(node_type=tfl_op.op.code, custom_type=tfl_op.op.custom_code,
-                                         outputs=output_names, op=tfl_op, label=tfl_op.type_name(),
-                                         name=node_unique_name)
-        else:
-            node = self.graph.add_vertex(node_type=tfl_op.op.code, outputs=output_names,
-                                         op=tfl_op, label=tfl_op.type_name(),
-                                         name=node_unique_name)
-
-        log.debug(f'NEW VERTEX:  {node["op"].type_name()}[{node["name"]}] {node["op"].inputs} -> {node["op"].outputs}')
-
-        for t in tensors:
-            if not output_exists:
-                assert t.name not in self.tensor_node_map, f"output tensor ({t.name}) should not be in the nodes map at this time"
-                self.tensor_map[t.name] = t
-            else:
-                if t.name in self.tensor_map:
-                    assert self.tensor_map[t.name] == t, f"output tensor ({t.name}) has changed during graph reconstruction"
-                else:
-                    log.debug(f'tensor node map add {t.name} during transformation')
-                    self.tensor_map[t.name] = t
-
-            self.tensor_node_map[t.name] = node['name']
-        return node
-
     def add_outputs(self, names: typing.List[str]):
         """ Add the output nodes with the names given
 
@@ -194,14 +168,79 @@ class CommonGraph(object):
             tfl_op (tfl.BaseOperator): The operator be added
             transform (bool, optional): Whether it is created by a transformable node. Defaults to False.
         """
-        input_nodes = self.add_nodes(tfl_op.inputs)
-        current_node = self.add_node(tfl_op.outputs, tfl_op, transform)
-        for idx, input_node in enumerate(input_nodes):
-            edge = self.graph.add_edge(input_node, current_node,
-                                       name=tfl_op.inputs[idx].name, label=tfl_op.inputs[idx].name)
-            log.debug(f'NEW EDGE: {input_node["label"]} -> {current_node["label"]} {self.tensor_map[edge["name"]]}')
-
-        output_names = set(self.outputs).intersection(set([t.name for t in tfl_op.outputs]))
+
+        self.add_operators([tfl_op], transform)
+
+    def add_operators(self, tfl_ops: typing.List[tfl.BaseOperator], transform: bool = False):
+        """ Add a list of new operators to the graph, the vertices and the edges are created in batches
+
+        Args:
+            tfl_ops (typing.List[tfl.BaseOperator]): The operators to be added
+            transform (bool, optional): Whether they are created by a transformable node. Defaults to False.
+        """
+
+        constant_names = []
+        op_attrs = {'node_type': [], 'outputs': [], 'op': [], 'label': [], 'name': [], 'custom_type': []}
+        edges = []
+        edge_names = []
+        output_names = []
+
+        for tfl_op in tfl_ops:
+            node_unique_name = f'__tinynn_op_{self.node_op_counter}__'
+            self.node_op_counter += 1
+
+            # Input nodes, the ones that don't exist yet are constant nodes
+            for t in tfl_op.inputs:
+                if t.name in self.tensor_node_map:
+                    self.check_tensor_map(t.name, t)
+                else:
+                    self.tensor_map[t.name] = t
+                    self.tensor_node_map[t.name] = t.name
+                    constant_names.append(t.name)
+                edges.append((self.tensor_node_map[t.name], node_unique_name))
+                edge_names.append(t.name)
+
+            # Output tensors
+            for t in tfl_op.outputs:
+                if not transform:
+                    assert t.name not in self.tensor_node_map, f"output tensor ({t.name}) should not be in the nodes map at this time"
+                    self.tensor_map[t.name] = t
+                else:
+                    if t.name in self.tensor_map:
+                        assert self.tensor_map[t.name] == t, f"output tensor ({t.name}) has changed during graph reconstruction"
+                    else:
+                        log.debug(f'tensor node map add {t.name} during transformation')
+                        self.tensor_map[t.name] = t
+
+                self.tensor_node_map[t.name] = node_unique_name
+
+            op_attrs['node_type'].append(tfl_op.op.code)
+            op_attrs['outputs'].append([t.name for t in tfl_op.outputs])
+            op_attrs['op'].append(tfl_op)
+            op_attrs['label'].append(tfl_op.type_name())
+            op_attrs['name'].append(node_unique_name)
+            op_attrs['custom_type'].append(tfl_op.op.custom_code)
+
+            log.debug(f'NEW VERTEX:  {tfl_op.type_name()}[{node_unique_name}] {tfl_op.inputs} -> {tfl_op.outputs}')
+
+            output_names.extend(name for name in op_attrs['outputs'][-1] if name in self.outputs)
+
+        # Only create the `custom_type` attribute when there are custom ops
+        if all((x is None for x in op_attrs['custom_type'])):
+            del op_attrs['custom_type']
+
+        constant_label = ExtendedOperator(ExtendedOperator.CONSTANT_NODE).type_name()
+        self.graph.add_vertices(len(constant_names), attributes={
+            'node_type': [ExtendedOperator.CONSTANT_NODE] * len(constant_names),
+            'outputs': [[name] for name in constant_names],
+            'label': [constant_label] * len(constant_names),
+            'name': constant_names})
+        self.graph.add_vertices(len(tfl_ops), attributes=op_attrs)
+        self.graph.add_edges(edges, attributes={'name': edge_names, 'label': edge_names})
+
+        for (source, target), name in zip(edges, edge_names):
+            log.debug(f'NEW EDGE: {source} -> {target} {self.tensor_map[name]}')
+
         self.add_outputs(output_names)
 
     def try_restore_edges(self, mapping: typing.List[typing.Tuple[str, str]]):
@@ -211,14 +250,51 @@ class CommonGraph(object):
             mapping (typing.List[typing.Tuple[str, str]]): A list of mapping (edge name, target node nam)
         """
 
+        pairs = []
+        names = []
         for edge_name, node_name in mapping:
-            cand = self.graph.vs.select(name=node_name)
             # Only restore when the node exists
-            if cand:
-                next_node = cand[0]
-                prev_node = self.graph.vs.find(name=self.tensor_node_map[edge_name])
-                edge = self.graph.add_edge(prev_node, next_node, name=edge_name, label=edge_name)
-                log.debug(f'NEW EDGE: {prev_node["label"]} -> {next_node["label"]} {self.tensor_map[edge["name"]]}')
+            # `find` goes through the name index of igraph, while `select` scans all the vertices
+            try:
+                next_node = self.graph.vs.find(name=node_name)
+            except ValueError:
+                continue
+
+            prev_node = self.graph.vs.find(name=self.tensor_node_map[edge_name])
+            pairs.append((prev_node.index, next_node.index))
+            names.append(edge_name)
+            log.debug(f'NEW EDGE: {prev_node["label"]} -> {next_node["label"]} {self.tensor_map[edge_name]}')
+
+        self.graph.add_edges(pairs, attributes={'name': names, 'label': names})
+
+    def queue_restore(self, mapping: typing.List[typing.Tuple[str, str]]):
+        """ Restore the edges between nodes, or queue them up if inside `defer_restore`
+
+        Args:
+            mapping (typing.List[typing.Tuple[str, str]]): A list of mapping (edge name, target node nam)
+        """
+
+        if self.pending_restore_mapping is None:
+            self.try_restore_edges(mapping)
+        else:
+            self.pending_restore_mapping.extend(mapping)
+
+    @contextlib.contextmanager
+    def defer_restore(self):
+        """ Context manager that collects the mappings passed to `queue_restore` and restores them all on exit """
+
+        if self.pending_restore_mapping is not None:
+            yield
+            return
+
+        self.pending_restore_mapping = []
+        try:
+            yield
+            mapping = self.pending_restore_mapping
+        finally:
+            self.pending_restore_mapping = None
+
+        self.try_restore_edges(mapping)
 
     def replace_operator_input(self, node: ig.Vertex, input_idx: int, new_tensor: tfl.Tensor, return_ids: bool = False) -> typing.Optional[typing.List[int]]:
         """ Use a new input tensor in a op node
@@ -130,7 +130,7 @@ class OPVersioner(object):
             else:
                 op.op.version = 1
         elif op.op.code == ExtendedOperator.SLICE:
-            if op.inputs[0].dtype.startswith('<U'):
+            if op.inputs[0].dtype.kind == 'U':
                 op.op.version = 3
             elif op.inputs[0].dtype == 'int8':
                 op.op.version = 2
@@ -68,7 +68,7 @@ class GraphOptimizer(object):
             tensor['label'] = bn['outputs'][0]
 
             bn_activ = bn['op'].fusedActivationFunction
-            conv_activ = conv['op'].fusedActivationFunction
+            conv_activ = getattr(conv['op'], 'fusedActivationFunction', None)
             if bn_activ != ActivationFunctionType.NONE and conv_activ == ActivationFunctionType.NONE:
                 conv['op'].fusedActivationFunction = bn_activ
 
@@ -82,7 +82,10 @@ class GraphOptimizer(object):
             eps = bn['op'].eps
 
             # Fuse conv/fc and batch-norm
-            new_weight = fuse_bn_weight(eps, bn_w, bn_var, activ_w)
+            if conv['node_type'] == ExtendedOperator.GENERIC_DECONV:
+                new_weight = fuse_bn_weight(eps, bn_w, bn_var, activ_w, transpose=True, groups=conv['op'].groups)
+            else:
+                new_weight = fuse_bn_weight(eps, bn_w, bn_var, activ_w)
             new_bias = fuse_bn_bias(eps, bn_w, bn_var, bn_mean, bn_b, activ_b)
 
             # New attribute tensors
@@ -175,9 +178,24 @@ class GraphOptimizer(object):
         # Delete nodes before transformation in the graph
         self.graph.graph.delete_vertices(remove_ids)
 
-        # Do transformation
-        for op, mapping in zip(sorted_ops, restore_mapping):
-            op.transform(self.graph, mapping)
+        # Do transformation, the edges to the following nodes are restored all at once afterwards
+        with self.graph.defer_restore():
+            for op, mapping in zip(sorted_ops, restore_mapping):
+                op.transform(self.graph, mapping)
+
+        # The NHWC->NCHW transposes may be bypassed by the transformed ops that follow,
+        # so we remove the ones that have no consumers left
+        dead_ids = []
+        for node_name in self.graph.bypassed_transposes:
+            node = self.graph.graph.vs.find(name=node_name)
+            if node.outdegree() == 0:
+                for output_name in node['outputs']:
+                    del self.graph.tensor_map[output_name]
+                    del self.graph.tensor_node_map[output_name]
+                dead_ids.append(node.index)
+
+        self.graph.bypassed_transposes.clear()
+        self.graph.graph.delete_vertices(dead_ids)
 
     def fuse_simple_transpose_pass(self):
         edges = self.graph.graph.es.select(functools.partial(
@@ -978,9 +996,11 @@ def is_bn_fusable_edge(edge: ig.Edge, graph_converter: ig.Graph):
     target_vertex = graph_converter.vs[edge.target]
     return source_vertex['node_type'] in (ExtendedOperator.GENERIC_CONV, ExtendedOperator.GENERIC_DECONV, ExtendedOperator.FULLY_CONNECTED) \
         and target_vertex['node_type'] == ExtendedOperator.BATCH_NORM and source_vertex.outdegree() == 1 \
+        and target_vertex['op'].inputs[0].quantization is None \
         and target_vertex['op'].inputs[1].buffer is not None and target_vertex['op'].inputs[2].buffer is not None \
         and source_vertex['op'].inputs[1].buffer is not None \
         and (target_vertex['op'].fusedActivationFunction == ActivationFunctionType.NONE or
+             source_vertex['node_type'] != ExtendedOperator.GENERIC_DECONV and
              source_vertex['op'].fusedActivationFunction in (ActivationFunctionType.NONE, target_vertex['op'].fusedActivationFunction))
 
 
@@ -1178,7 +1198,20 @@ def is_transpose_same_to_reshape_op(op: tfl.BaseOperator):
         return False
 
 
-def fuse_bn_weight(eps, scale, var, weight):
+def fuse_bn_weight(eps, scale, var, weight, transpose=False, groups=1):
+    if transpose:
+        # The weight of a transposed conv is laid out as [in, out // groups, ...],
+        # so move the output channels to the first axis and reuse the path below
+        orig_shape = weight.shape
+        grouped_shape = (groups, orig_shape[0] // groups) + orig_shape[1:]
+        weight = weight.reshape(grouped_shape).swapaxes(1, 2)
+        swapped_shape = weight.shape
+        weight = weight.reshape((-1, ) + swapped_shape[2:])
+
+        new_weight = fuse_bn_weight(eps, scale, var, weight)
+
+        return new_weight.reshape(swapped_shape).swapaxes(1, 2).reshape(orig_shape)
+
     while weight.ndim > scale.ndim:
         scale = scale[:, None]
     while weight.ndim > var.ndim:
@@ -43,6 +43,8 @@ class OpCode(object):
 
 
 class BaseOperator(object):
+    __slots__ = ('inputs', 'outputs', 'op', 'tfl_op', 'tfl_inputs_idx', 'tfl_outputs_idx')
+
     inputs: typing.List['Tensor']
     outputs: typing.List['Tensor']
     op: OpCode
@@ -131,6 +133,8 @@ class FakeQuantTensor(object):
 
 
 class Tensor(object):
+    __slots__ = ('tensor', 'name', 'quantization', 'buffer', 'dtype', 'shape', 'tfl_tensor', 'index', 'is_variable')
+
     tensor: np.ndarray
     name: str
     quantization: typing.Optional[QuantizationParameters]
@@ -213,6 +217,8 @@ class Tensor(object):
 
 
 class OptionalTensor(Tensor):
+    __slots__ = ()
+
     def __init__(self):
         self.index = -1
         self.quantization = None
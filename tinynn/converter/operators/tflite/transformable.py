@@ -6,14 +6,26 @@ from . import generated_ops as tfl_ops
 from ..base import ExtendedOperator
 
 import typing
-import torch
 import tflite
 import warnings
 
 import numpy as np
 
+_NHWC2NCHW_PERM = np.array([0, 3, 1, 2], dtype='int32')
+_NCHW2NHWC_PERM = np.array([0, 2, 3, 1], dtype='int32')
+_NCHW2CHWN_PERM = np.array([1, 2, 3, 0], dtype='int32')
+
+# These arrays are shared by all the perm tensors, so make sure nobody modifies them
+for _perm in (_NHWC2NCHW_PERM, _NCHW2NHWC_PERM, _NCHW2CHWN_PERM):
+    _perm.flags.writeable = False
+
+# Weight layout of the TFLite conv ops, indexed by whether the conv is depthwise
+_CONV_WEIGHT_PERMS = {True: _NCHW2CHWN_PERM, False: _NCHW2NHWC_PERM}
+
 
 class TransformableOperator(BaseOperator):
+    __slots__ = ('attr_count', 'transform_count')
+
     def __init__(self, op: int, inputs: typing.List['Tensor'], outputs: typing.List['Tensor'], op_version: int):
         super().__init__(op, inputs, outputs, op_version=op_version)
         self.attr_count = 0
@@ -41,32 +53,58 @@ class TransformableOperator(BaseOperator):
             self.transform_count += 1
         return Tensor(tensor, name, has_buffer=False, quantization=quantization)
 
+    def create_transform_tensor_shape(self, shape, dtype, name=None, quantization=None):
+        # The data of transform tensors is never used, so we only need an uninitialized array of the given shape
+        return self.create_transform_tensor(np.empty(shape, dtype=dtype), name=name, quantization=quantization)
+
     def wrap_ops_with_nhwc_nchw_transposes(self, ops: typing.List[tfl_ops.BaseOperator], input_idx: int = 0,
-                                           output_idx: int = 0) -> typing.List[tfl_ops.BaseOperator]:
+                                           output_idx: int = 0, graph_converter=None) -> typing.List[tfl_ops.BaseOperator]:
         orig_input = ops[0].inputs[input_idx]
         orig_output = ops[-1].outputs[output_idx]
 
-        nhwc2nchw_perm = np.array([0, 3, 1, 2], dtype='int32')
-        nchw2nhwc_perm = np.array([0, 2, 3, 1], dtype='int32')
+        nhwc2nchw_perm_tensor = self.create_attr_tensor(_NHWC2NCHW_PERM)
+        new_output = self.create_transform_tensor_shape(tuple(orig_output.shape[i] for i in _NCHW2NHWC_PERM),
+                                                        orig_output.dtype, quantization=orig_output.quantization)
+        nhwc2nchw_transpose = tfl_ops.TransposeOperator([new_output, nhwc2nchw_perm_tensor], [orig_output])
+        ops[-1].outputs[output_idx] = new_output
 
-        nhwc2nchw_perm_tensor = self.create_attr_tensor(nhwc2nchw_perm)
-        nchw2nhwc_perm_tensor = self.create_attr_tensor(nchw2nhwc_perm)
+        # If the input comes from a NHWC->NCHW transpose (e.g. the output of another conv), use its input directly.
+        # The bypassed transpose node is removed in `GraphOptimizer.transform_graph` if it has no other consumers.
+        prev_input = None
+        if graph_converter is not None:
+            prev_input = find_nhwc_source_tensor(graph_converter, orig_input)
 
-        new_input = self.create_transform_tensor(np.transpose(
-            orig_input.tensor, nchw2nhwc_perm), quantization=orig_input.quantization)
-        new_output = self.create_transform_tensor(np.transpose(
-            orig_output.tensor, nchw2nhwc_perm), quantization=orig_output.quantization)
+        if prev_input is not None:
+            graph_converter.bypassed_transposes.add(graph_converter.tensor_node_map[orig_input.name])
+            ops[0].inputs[input_idx] = prev_input
+            return ops + [nhwc2nchw_transpose]
 
+        nchw2nhwc_perm_tensor = self.create_attr_tensor(_NCHW2NHWC_PERM)
+        new_input = self.create_transform_tensor_shape(tuple(orig_input.shape[i] for i in _NCHW2NHWC_PERM),
+                                                       orig_input.dtype, quantization=orig_input.quantization)
         nchw2nhwc_transpose = tfl_ops.TransposeOperator([orig_input, nchw2nhwc_perm_tensor], [new_input])
-        nhwc2nchw_transpose = tfl_ops.TransposeOperator([new_output, nhwc2nchw_perm_tensor], [orig_output])
-
         ops[0].inputs[input_idx] = new_input
-        ops[-1].outputs[output_idx] = new_output
 
         return [nchw2nhwc_transpose] + ops + [nhwc2nchw_transpose]
 
+    def reorder_conv_weight(self, ops: typing.List[tfl_ops.BaseOperator], conv_op: tfl_ops.BaseOperator, perm: np.ndarray):
+        weight = conv_op.inputs[1]
+        if weight.buffer is not None:
+            # Constant weights are reordered at conversion time, so that no Transpose op is needed
+            reordered = np.ascontiguousarray(np.transpose(weight.tensor, perm))
+            conv_op.inputs[1] = self.create_attr_tensor(reordered, quantization=weight.quantization)
+        else:
+            perm_tensor = self.create_attr_tensor(perm)
+            reordered_weight = self.create_transform_tensor_shape(tuple(weight.shape[i] for i in perm),
+                                                                  weight.dtype, quantization=weight.quantization)
+            conv_op.inputs[1] = reordered_weight
+            reorder_op = tfl_ops.TransposeOperator([weight, perm_tensor], [reordered_weight])
+            ops.insert(ops.index(conv_op), reorder_op)
+
 
 class BatchNormOperator(TransformableOperator):
+    __slots__ = ('eps', 'fusedActivationFunction')
+
     input_index = 0
     weight_index = 1
     bias_index = 2
@@ -75,6 +113,10 @@ class BatchNormOperator(TransformableOperator):
 
     output_index = 0
 
+    # The max error (in the unit of the output scale) allowed for the quantized affine op. The output is rounded
+    # to the nearest quantization step anyway, so half a step keeps it within one step of the float computation.
+    quantized_affine_tolerance = 0.5
+
     def __init__(self, inputs: typing.List['Tensor'], outputs: typing.List['Tensor'], eps: float, quantization: typing.Union[QuantizationParameters] = None,
                  fusedActivationFunction=tflite.ActivationFunctionType.NONE):
         super().__init__(ExtendedOperator.BATCH_NORM, inputs, outputs, 1)
@@ -86,45 +128,124 @@ class BatchNormOperator(TransformableOperator):
 
         w, b, mean, var = [self.inputs[i]
                            for i in (self.weight_index, self.bias_index, self.running_mean_index, self.running_variance_index)]
-        eps = np.array(self.eps, dtype='float32')
-        new_w = w.tensor / (np.sqrt(var.tensor + eps, dtype='float32'))
-        new_b = b.tensor - w.tensor * mean.tensor / (np.sqrt(var.tensor + eps, dtype='float32'))
-
         inp = self.inputs[0]
+        inp_dim = len(inp.shape)
+
+        new_shape = [1] + [w.shape[0]] + [1] * (inp_dim - 2)
+
+        eps = np.array(self.eps, dtype='float32')
+        inv = np.sqrt(var.tensor + eps, dtype='float32')
+        np.reciprocal(inv, out=inv)
+        inv = inv.reshape(new_shape)
+        scale = w.tensor.reshape(new_shape)
+        new_w = scale * inv
+        new_b = b.tensor.reshape(new_shape) - scale * mean.tensor.reshape(new_shape) * inv
 
-        new_shape = [1] + [new_w.shape[0]] + [1] * (inp.tensor.ndim - 2)
+        if inp.quantization is not None and inp_dim == 4:
+            ops = self.quantized_affine_ops(new_w.flatten(), new_b.flatten(), graph_converter)
+            if ops is not None:
+                graph_converter.add_operators(ops, transform=True)
 
-        new_w = new_w.reshape(new_shape)
-        new_b = new_b.reshape(new_shape)
+                graph_converter.queue_restore(mapping)
+                return
 
         weight = self.create_attr_tensor(new_w)
         bias = self.create_attr_tensor(new_b)
 
+        ops = []
+
         new_inp = inp
         if inp.quantization is not None:
-            new_inp = self.create_transform_tensor(inp.tensor)
-            graph_converter.add_operator(tfl_ops.DequantizeOperator([inp], [new_inp]))
+            new_inp = self.create_transform_tensor_shape(inp.shape, 'float32')
+            ops.append(tfl_ops.DequantizeOperator([inp], [new_inp]))
 
-        mul_out = self.create_transform_tensor(new_inp.tensor * weight.tensor)
-        graph_converter.add_operator(tfl_ops.MulOperator([inp, weight], [mul_out]))
+        # The weight and the bias are in the shape of [1, C, 1, ...], so broadcasting doesn't change the shape
+        mul_out = self.create_transform_tensor_shape(new_inp.shape, new_inp.dtype)
+        ops.append(tfl_ops.MulOperator([new_inp, weight], [mul_out]))
 
         if inp.quantization is not None:
-            add_out = self.create_transform_tensor(mul_out.tensor + bias.tensor)
+            add_out = self.create_transform_tensor_shape(mul_out.shape, mul_out.dtype)
         else:
             add_out = self.outputs[self.output_index]
 
-        graph_converter.add_operator(tfl_ops.AddOperator([mul_out, bias], [add_out],
-                                                         fusedActivationFunction=self.fusedActivationFunction),
-                                     transform=True)
+        ops.append(tfl_ops.AddOperator([mul_out, bias], [add_out], fusedActivationFunction=self.fusedActivationFunction))
 
         if inp.quantization is not None:
             quant_out = self.outputs[self.output_index]
-            graph_converter.add_operator(tfl_ops.QuantizeOperator([add_out], [quant_out]), transform=True)
+            ops.append(tfl_ops.QuantizeOperator([add_out], [quant_out]))
+
+        graph_converter.add_operators(ops, transform=True)
+
+        graph_converter.queue_restore(mapping)
+
+    def quantized_affine_ops(self, scale: np.ndarray, shift: np.ndarray,
+                             graph_converter=None) -> typing.Optional[typing.List[tfl_ops.BaseOperator]]:
+        """ Lowers `y = x * scale + shift` on a quantized NCHW input to a 1x1 depthwise conv,
+        so that the requantization is done in a single op instead of going through float tensors
+
+        Args:
+            scale (np.ndarray): The per-channel scale
+            shift (np.ndarray): The per-channel shift
+            graph_converter (CommonGraph, optional): The graph, used to skip redundant transposes. Defaults to None.
+
+        Returns:
+            typing.Optional[typing.List[tfl_ops.BaseOperator]]: The depthwise conv op wrapped with the NHWC/NCHW \
+                transposes, or None if the affine op cannot be represented accurately with per-tensor quantization
+        """
+
+        inp = self.inputs[self.input_index]
+        outp = self.outputs[self.output_index]
+
+        # The weight is quantized as uint8, which must match the type of the input
+        if inp.dtype != np.uint8 or outp.quantization is None:
+            return None
+
+        # Per-tensor asymmetric quantization for the weight, the range should always cover zero
+        w_min = min(scale.min(), 0.0)
+        w_max = max(scale.max(), 0.0)
+        w_scale = float(w_max - w_min) / 255
+        if w_scale == 0:
+            w_scale = 1.0
+        w_zero_point = int(np.clip(np.round(-w_min / w_scale), 0, 255))
+        q_weight = np.clip(np.round(scale / w_scale + w_zero_point), 0, 255).astype('uint8')
+
+        # The bias shares the scale of the accumulator
+        bias_scale = inp.quantization.scale * w_scale
+        q_bias = np.round(shift / bias_scale)
 
-        graph_converter.try_restore_edges(mapping)
+        int32_info = np.iinfo('int32')
+        if q_bias.min() < int32_info.min or q_bias.max() > int32_info.max:
+            return None
+
+        # The per-channel scale is squeezed into a per-tensor weight, so the channels with a small scale
+        # may be rounded heavily. Bail out unless the error for all the possible input values is small enough.
+        w_error = np.abs((q_weight.astype('float64') - w_zero_point) * w_scale - scale)
+        b_error = np.abs(q_bias * bias_scale - shift)
+        inp_zero_point = inp.quantization.zero_point
+        max_inp = max(inp_zero_point, 255 - inp_zero_point) * inp.quantization.scale
+        max_error = np.max(w_error * max_inp + b_error)
+        if max_error > self.quantized_affine_tolerance * outp.quantization.scale:
+            return None
+
+        q_bias = q_bias.astype('int32')
+
+        weight = self.create_attr_tensor(q_weight.reshape(1, 1, 1, -1),
+                                         quantization=QuantizationParameters(w_scale, w_zero_point))
+        bias = self.create_attr_tensor(q_bias, quantization=QuantizationParameters(bias_scale, 0))
+
+        conv_op = tfl_ops.DepthwiseConv2dOperator(
+            [inp, weight, bias], [outp],
+            strideH=1, strideW=1,
+            depthMultiplier=1,
+            dilationHFactor=1, dilationWFactor=1,
+            fusedActivationFunction=self.fusedActivationFunction, padding=tflite.Padding.VALID)
+
+        return self.wrap_ops_with_nhwc_nchw_transposes([conv_op], graph_converter=graph_converter)
 
 
 class GenericConvOperator(TransformableOperator):
+    __slots__ = ('stride', 'padding', 'dilation', 'output_padding', 'groups', 'fusedActivationFunction')
+
     input_index = 0
     weight_index = 1
     bias_index = 2
@@ -155,8 +276,11 @@ class GenericConvOperator(TransformableOperator):
         input_tensor = self.inputs[0]
         weight_tensor = self.inputs[1]
 
-        input_dim = len(input_tensor.shape)
-        weight_dim = len(weight_tensor.shape)
+        input_shape = input_tensor.shape
+        weight_shape = weight_tensor.shape
+
+        input_dim = len(input_shape)
+        weight_dim = len(weight_shape)
 
         prev_ops = []
         next_ops = []
@@ -172,21 +296,22 @@ class GenericConvOperator(TransformableOperator):
                 reshape_input_size = 2
 
             reshape_outputs = [
-                self.create_transform_tensor(np.expand_dims(t.tensor, 2),
-                                             name=f'{self.outputs[0].name}_{t.name}_4d_input',
-                                             quantization=t.quantization) for t in self.inputs[:reshape_input_size]]
-            reshape_attrs = [self.create_attr_tensor(np.array(t.shape, dtype='int32')) for t in reshape_outputs]
+                self.create_transform_tensor_shape(t.shape[:2] + (1, ) + t.shape[2:], t.dtype,
+                                                   name=f'{self.outputs[0].name}_{t.name}_4d_input',
+                                                   quantization=t.quantization) for t in self.inputs[:reshape_input_size]]
+            reshape_shapes = np.array([t.shape for t in reshape_outputs], dtype='int32')
+            reshape_attrs = [self.create_attr_tensor(shape) for shape in reshape_shapes]
             reshape_ops = [tfl_ops.ReshapeOperator([old, attr], [new], attr.tensor)
                            for old, new, attr in zip(self.inputs[:reshape_input_size], reshape_outputs, reshape_attrs)]
 
             prev_ops.extend(reshape_ops)
 
-            conv_outputs = [self.create_transform_tensor(
-                np.expand_dims(self.outputs[i].tensor, 2),
-                name=f'{self.outputs[i].name}_4d_output',
-                quantization=self.outputs[i].quantization) for i in range(reshape_output_size)]
-            conv_attrs = [self.create_attr_tensor(np.array(t.shape, dtype='int32'))
-                          for t in self.outputs[:reshape_output_size]]
+            conv_outputs = [self.create_transform_tensor_shape(
+                t.shape[:2] + (1, ) + t.shape[2:], t.dtype,
+                name=f'{t.name}_4d_output',
+                quantization=t.quantization) for t in self.outputs[:reshape_output_size]]
+            conv_shapes = np.array([t.shape for t in self.outputs[:reshape_output_size]], dtype='int32')
+            conv_attrs = [self.create_attr_tensor(shape) for shape in conv_shapes]
             conv_ops = [tfl_ops.ReshapeOperator([old, attr], [new], attr.tensor)
                         for old, new, attr in zip(conv_outputs, self.outputs[:reshape_output_size], conv_attrs)]
 
@@ -196,10 +321,13 @@ class GenericConvOperator(TransformableOperator):
             self.outputs = conv_outputs + self.outputs[reshape_output_size:]
 
             weight_tensor = self.inputs[1]
+            weight_shape = weight_tensor.shape
         elif weight_dim != 4:
             assert False, "Only Conv[Transpose]1d/2d is supported"
 
-        if weight_tensor.shape[1] == 1 and weight_tensor.shape[0] == self.groups:
+        is_dw = weight_shape[1] == 1 and weight_shape[0] == self.groups
+
+        if is_dw:
             conv_op = tfl_ops.DepthwiseConv2dOperator(
                 self.inputs, self.outputs,
                 strideH=self.stride[0], strideW=self.stride[1],
@@ -207,7 +335,7 @@ class GenericConvOperator(TransformableOperator):
                 dilationHFactor=self.dilation[0], dilationWFactor=self.dilation[1],
                 fusedActivationFunction=self.fusedActivationFunction, padding=tflite.Padding.VALID)
         else:
-            if input_tensor.shape[1] != weight_tensor.shape[1]:
+            if input_shape[1] != weight_shape[1]:
                 warnings.warn('Group conv is not supported if official tflite interpreter is used')
             conv_op = tfl_ops.Conv2dOperator(
                 self.inputs, self.outputs,
@@ -215,47 +343,36 @@ class GenericConvOperator(TransformableOperator):
                 dilationHFactor=self.dilation[0], dilationWFactor=self.dilation[1],
                 fusedActivationFunction=self.fusedActivationFunction, padding=tflite.Padding.VALID)
 
-        ops = self.wrap_ops_with_nhwc_nchw_transposes([conv_op])
-        conv_op = ops[1]
+        ops = self.wrap_ops_with_nhwc_nchw_transposes([conv_op], graph_converter=graph_converter)
 
         # Pad handling
         if sum(self.padding) > 0:
             pad_h = self.padding[0]
             pad_w = self.padding[1]
 
-            pad = [[0, 0], [pad_h, pad_h], [pad_w, pad_w], [0, 0]]
-            pad_tensor = self.create_attr_tensor(np.array(pad, dtype='int32'))
+            pad_input = conv_op.inputs[0]
+
+            # Use the builtin padding of the conv op if possible, so that no extra Pad op is needed
+            if is_same_padding(pad_input.shape[1:3], weight_shape[2:], self.stride, self.dilation, self.padding):
+                conv_op.padding = tflite.Padding.SAME
+            else:
+                pad = [[0, 0], [pad_h, pad_h], [pad_w, pad_w], [0, 0]]
+                pad_tensor = self.create_attr_tensor(np.array(pad, dtype='int32'))
 
-            pad_input = ops[0].outputs[0]
-            pad_array = np.pad(pad_input.tensor, pad)
-            pad_out = self.create_transform_tensor(pad_array, quantization=pad_input.quantization)
-            ops[1].inputs[0] = pad_out
+                pad_shape = tuple(dim + before + after for dim, (before, after) in zip(pad_input.shape, pad))
+                pad_out = self.create_transform_tensor_shape(pad_shape, pad_input.dtype,
+                                                             quantization=pad_input.quantization)
+                conv_op.inputs[0] = pad_out
 
-            pad_op = tfl_ops.PadOperator([pad_input, pad_tensor], [pad_out])
-            ops.insert(1, pad_op)
+                pad_op = tfl_ops.PadOperator([pad_input, pad_tensor], [pad_out])
+                ops.insert(ops.index(conv_op), pad_op)
 
         # Weight handling
-        weight = conv_op.inputs[1]
-        if conv_op.op.code == tflite.BuiltinOperator.DEPTHWISE_CONV_2D:
-            nchw2chwn_perm = np.array([1, 2, 3, 0], dtype='int32')
-            nchw2chwn_perm_tensor = self.create_attr_tensor(nchw2chwn_perm)
-            reordered_weight = self.create_transform_tensor(np.transpose(
-                weight.tensor, nchw2chwn_perm), quantization=weight.quantization)
-            conv_op.inputs[1] = reordered_weight
-            reorder_op = tfl_ops.TransposeOperator([weight, nchw2chwn_perm_tensor], [reordered_weight])
-        else:
-            nchw2nhwc_perm = np.array([0, 2, 3, 1], dtype='int32')
-            nchw2nhwc_perm_tensor = self.create_attr_tensor(nchw2nhwc_perm)
-            reordered_weight = self.create_transform_tensor(np.transpose(
-                weight.tensor, nchw2nhwc_perm), quantization=weight.quantization)
-            conv_op.inputs[1] = reordered_weight
-            reorder_op = tfl_ops.TransposeOperator([weight, nchw2nhwc_perm_tensor], [reordered_weight])
-        ops.insert(1, reorder_op)
+        self.reorder_conv_weight(ops, conv_op, _CONV_WEIGHT_PERMS[is_dw])
 
         # Bias handling
-        kernel_num = self.inputs[1].shape[0]
-        if conv_op.op.code == tflite.BuiltinOperator.DEPTHWISE_CONV_2D:
-            kernel_num = self.inputs[1].shape[3]
+        # The number of output channels, taken from the weight shape before reordering
+        kernel_num = weight_shape[0]
 
         if len(conv_op.inputs) == 2 or conv_op.inputs[2] is None:
             if conv_op.inputs[0].dtype == np.float32:
@@ -265,19 +382,19 @@ class GenericConvOperator(TransformableOperator):
 
             conv_op.inputs.append(self.create_attr_tensor(bias))
         elif conv_op.inputs[2].shape[0] != kernel_num and conv_op.inputs[2].shape[0] == 1:
+            orig_bias = conv_op.inputs[2]
             if conv_op.inputs[0].dtype == np.float32:
-                bias = torch.tensor([conv_op.inputs[2][0]] * kernel_num, dtype='float32')
+                bias = np.full((kernel_num, ), orig_bias.tensor.flat[0], dtype='float32')
             else:
-                bias = torch.tensor([conv_op.inputs[2][0]] * kernel_num, dtype='int32')
+                bias = np.full((kernel_num, ), orig_bias.tensor.flat[0], dtype='int32')
 
-            conv_op.inputs[2] = self.create_attr_tensor(bias)
+            conv_op.inputs[2] = self.create_attr_tensor(bias, quantization=orig_bias.quantization)
 
         ops = prev_ops + ops + next_ops
 
-        for op in ops:
-            graph_converter.add_operator(op, transform=True)
+        graph_converter.add_operators(ops, transform=True)
 
-        graph_converter.try_restore_edges(mapping)
+        graph_converter.queue_restore(mapping)
 
         for op in ops[:-1]:
             output_name = op.outputs[0].name
@@ -290,6 +407,8 @@ class GenericConvOperator(TransformableOperator):
 
 
 class GenericTransposeConvOperator(TransformableOperator):
+    __slots__ = ('stride', 'padding', 'dilation', 'output_padding', 'groups')
+
     input_index = 0
     weight_index = 1
     bias_index = 2
@@ -326,21 +445,23 @@ class GenericTransposeConvOperator(TransformableOperator):
             self.dilation.insert(0, 1)
             self.output_padding.insert(0, 0)
 
-            reshape_outputs = [self.create_transform_tensor(
-                np.expand_dims(t.tensor, 2),
+            reshape_outputs = [self.create_transform_tensor_shape(
+                t.shape[:2] + (1, ) + t.shape[2:], t.dtype,
                 name=f'{self.outputs[0].name}_{t.name}_4d_input',
                 quantization=t.quantization) for t in self.inputs[:2]]
-            reshape_attrs = [self.create_attr_tensor(np.array(t.shape, dtype='int32')) for t in reshape_outputs]
+            reshape_shapes = np.array([t.shape for t in reshape_outputs], dtype='int32')
+            reshape_attrs = [self.create_attr_tensor(shape) for shape in reshape_shapes]
             reshape_ops = [tfl_ops.ReshapeOperator([old, attr], [new], attr.tensor)
                            for old, new, attr in zip(self.inputs[:2], reshape_outputs, reshape_attrs)]
 
             prev_ops.extend(reshape_ops)
 
-            conv_outputs = [self.create_transform_tensor(
-                np.expand_dims(self.outputs[0].tensor, 2),
+            conv_outputs = [self.create_transform_tensor_shape(
+                self.outputs[0].shape[:2] + (1, ) + self.outputs[0].shape[2:], self.outputs[0].dtype,
                 name=f'{self.outputs[0].name}_4d_output',
                 quantization=self.outputs[0].quantization)]
-            conv_attrs = [self.create_attr_tensor(np.array(t.shape, dtype='int32')) for t in self.outputs[:1]]
+            conv_shapes = np.array([t.shape for t in self.outputs[:1]], dtype='int32')
+            conv_attrs = [self.create_attr_tensor(shape) for shape in conv_shapes]
             conv_ops = [tfl_ops.ReshapeOperator([old, attr], [new], attr.tensor)
                         for old, new, attr in zip(conv_outputs, self.outputs[:1], conv_attrs)]
 
@@ -356,7 +477,7 @@ class GenericTransposeConvOperator(TransformableOperator):
         conv_op = tfl_ops.TransposeConvOperator(
             self.inputs[:2][::-1], self.outputs, strideH=self.stride[0], strideW=self.stride[1], padding=tflite.Padding.VALID)
 
-        ops = self.wrap_ops_with_nhwc_nchw_transposes([conv_op], input_idx=1)
+        ops = self.wrap_ops_with_nhwc_nchw_transposes([conv_op], input_idx=1, graph_converter=graph_converter)
 
         # Pad handling
         output_shape = conv_op.outputs[0].shape
@@ -365,46 +486,90 @@ class GenericTransposeConvOperator(TransformableOperator):
             pad_w = self.padding[1]
 
             start = np.array([0, pad_h, pad_w, 0], dtype='int32')
-            size = np.array(ops[1].outputs[0].shape, dtype='int32')
+            size = np.array(conv_op.outputs[0].shape, dtype='int32')
 
             start_tensor = self.create_attr_tensor(start)
             size_tensor = self.create_attr_tensor(size)
 
-            slice_out = ops[1].outputs[0]
+            slice_out = conv_op.outputs[0]
             pad_sizes = ((0, 0), (pad_h, pad_h), (pad_w, pad_w), (0, 0))
-            pad_array = np.pad(self.outputs[0].tensor, pad_sizes)
-            slice_input = self.create_transform_tensor(pad_array, quantization=self.outputs[0].quantization)
-            ops[1].outputs[0] = slice_input
+            pad_shape = tuple(dim + before + after for dim, (before, after) in zip(self.outputs[0].shape, pad_sizes))
+            slice_input = self.create_transform_tensor_shape(pad_shape, self.outputs[0].dtype,
+                                                             quantization=self.outputs[0].quantization)
+            conv_op.outputs[0] = slice_input
 
             slice_op = tfl_ops.SliceOperator([slice_input, start_tensor, size_tensor], [slice_out])
             output_shape = slice_input.shape
-            ops.insert(2, slice_op)
+            ops.insert(ops.index(conv_op) + 1, slice_op)
 
         # Output shape handling
         output_shape_tensor = self.create_attr_tensor(np.array(output_shape, dtype='int32'))
         conv_op.inputs.insert(0, output_shape_tensor)
 
         # Weight handling
-        weight = conv_op.inputs[1]
-        nchw2chwn_perm = np.array([1, 2, 3, 0], dtype='int32')
-        nchw2chwn_perm_tensor = self.create_attr_tensor(nchw2chwn_perm)
-        reordered_weight = self.create_transform_tensor(np.transpose(
-            weight.tensor, nchw2chwn_perm), quantization=weight.quantization)
-        conv_op.inputs[1] = reordered_weight
-        reorder_op = tfl_ops.TransposeOperator([weight, nchw2chwn_perm_tensor], [reordered_weight])
-        ops.insert(1, reorder_op)
+        self.reorder_conv_weight(ops, conv_op, _NCHW2CHWN_PERM)
 
         # Bias handling
         if len(self.inputs) > 2 and self.inputs[2] is not None:
             bias_tensor = self.inputs[2]
             add_out = ops[-2].outputs[0]
-            bias_transform = self.create_transform_tensor(add_out.tensor.copy())
+            bias_transform = self.create_transform_tensor_shape(add_out.shape, add_out.dtype)
             ops[-2].outputs[0] = bias_transform
             ops.insert(len(ops) - 1, tfl_ops.AddOperator([bias_transform, bias_tensor], [add_out]))
 
         ops = prev_ops + ops + next_ops
 
-        for op in ops:
-            graph_converter.add_operator(op)
+        graph_converter.add_operators(ops)
+
+        graph_converter.queue_restore(mapping)
+
+
+def find_nhwc_source_tensor(graph_converter, tensor: Tensor) -> typing.Optional[Tensor]:
+    """ Find the NHWC tensor if the given tensor is produced by a NHWC->NCHW transpose
+
+    Args:
+        graph_converter (CommonGraph): The graph
+        tensor (Tensor): The NCHW tensor
+
+    Returns:
+        typing.Optional[Tensor]: The input tensor of the transpose op if found, otherwise None
+    """
+
+    node_name = graph_converter.tensor_node_map.get(tensor.name, None)
+    if node_name is None:
+        return None
+
+    node = graph_converter.graph.vs.find(name=node_name)
+    if node['node_type'] != ExtendedOperator.TRANSPOSE:
+        return None
+
+    perm = node['op'].inputs[1]
+    if perm.buffer is None or not np.array_equal(perm.tensor, _NHWC2NCHW_PERM):
+        return None
+
+    return node['op'].inputs[0]
+
+
+def is_same_padding(input_size: typing.Iterable[int], kernel_size: typing.Iterable[int], stride: typing.Iterable[int],
+                    dilation: typing.Iterable[int], padding: typing.Iterable[int]) -> bool:
+    """ Whether the symmetric padding is equivalent to `tflite.Padding.SAME`
+
+    Args:
+        input_size (typing.Iterable[int]): The spatial dims of the input
+        kernel_size (typing.Iterable[int]): The spatial dims of the kernel
+        stride (typing.Iterable[int]): The strides
+        dilation (typing.Iterable[int]): The dilations
+        padding (typing.Iterable[int]): The padding on each side of the spatial dims
+
+    Returns:
+        bool: Whether the conv op may use the SAME padding instead
+    """
 
-        graph_converter.try_restore_edges(mapping)
+    for size, kernel, s, d, pad in zip(input_size, kernel_size, stride, dilation, padding):
+        # TFLite pads the input so that out = ceil(in / stride), putting the extra one (if any) at the end
+        effective_kernel = (kernel - 1) * d + 1
+        out_size = (size + s - 1) // s
+        total_pad = max((out_size - 1) * s + effective_kernel - size, 0)
+        if total_pad != pad * 2:
+            return False
+    return True
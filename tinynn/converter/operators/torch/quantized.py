@@ -159,9 +159,8 @@ class QuantizedBatchNorm2dOperator(QuantizedBatchNorm2dSchema):
         inputs = [self.find_or_create_input(i, graph_converter) for i in range(5)]
         outputs = self.to_tfl_tensors(self.output_names, self.output_tensors)
 
-        ops = self.wrap_ops_with_dequant_quants([tfl.BatchNormOperator(inputs, outputs, eps)])
-        for op in ops:
-            graph_converter.add_operator(op)
+        # Quantized 2d batch-norms are lowered to a quantized affine op in `BatchNormOperator.transform` if possible
+        graph_converter.add_operator(tfl.BatchNormOperator(inputs, outputs, eps))
 
 
 class QuantizedBatchNorm2dReluOperator(QuantizedBatchNorm2dReluSchema):
@@ -173,10 +172,8 @@ class QuantizedBatchNorm2dReluOperator(QuantizedBatchNorm2dReluSchema):
         inputs = [self.find_or_create_input(i, graph_converter) for i in range(5)]
         outputs = self.to_tfl_tensors(self.output_names, self.output_tensors)
 
-        ops = self.wrap_ops_with_dequant_quants([tfl.BatchNormOperator(
-            inputs, outputs, eps, tfl_schema.ActivationFunctionType.RELU)])
-        for op in ops:
-            graph_converter.add_operator(op)
+        graph_converter.add_operator(tfl.BatchNormOperator(
+            inputs, outputs, eps, fusedActivationFunction=tfl_schema.ActivationFunctionType.RELU))
 
 
 class QuantizedAddScalarOperator(QuantizedAddScalarSchema):